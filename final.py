@@ -1,39 +1,174 @@
 import streamlit as st
 import csv
+import copy
 import os
 import re
+import random
 import smtplib
 import logging
-from email.mime.text import MIMEText
-from email.mime.image import MIMEImage
-from email.mime.multipart import MIMEMultipart
+import logging.handlers
+import asyncio
+import queue
+import threading
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email import policy
+from email.message import EmailMessage, MIMEPart
 from datetime import datetime
-from time import sleep
-from typing import List, Optional
+from time import sleep, monotonic
+from typing import BinaryIO, Iterator, List, Optional
 import io
 
+try:
+    import aiosmtplib
+except ImportError:
+    aiosmtplib = None
+
+
+# Email address pattern, applied line-by-line to a newline-joined batch of addresses
+_EMAIL_RE_MULTILINE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', re.MULTILINE)
+
+# Header names recognised as the email column, in order of preference
+EMAIL_COLUMN_NAMES = ('email', 'email_address', 'email address', 'e-mail', 'e-mail address', 'mail')
+
+# Number of CSV rows validated per batch
+CSV_BATCH_SIZE = 10000
+
+# Rotate the SMTP session after this many messages to stay under per-connection caps
+MAX_MESSAGES_PER_CONNECTION = 500
+
+# Number of SMTP sessions kept open concurrently
+DEFAULT_POOL_SIZE = 5
+
+# Abort the campaign when at least a third of a batch of this many sends fails
+ABORT_BATCH_SIZE = 30
+
+# Refresh Streamlit progress every 1% of the campaign, but never more often than this many seconds
+PROGRESS_UPDATE_INTERVAL = 0.1
+
+
+def _smtp_code(error: Exception) -> Optional[int]:
+    """Extract the SMTP reply code from an smtplib or aiosmtplib exception, if any."""
+    recipients = getattr(error, 'recipients', None)
+    if isinstance(recipients, dict) and recipients:
+        # smtplib.SMTPRecipientsRefused: {address: (code, message)}
+        return next(iter(recipients.values()))[0]
+    if isinstance(recipients, list) and recipients:
+        # aiosmtplib.SMTPRecipientsRefused: [SMTPRecipientRefused, ...]
+        return recipients[0].code
+    return getattr(error, 'smtp_code', None) or getattr(error, 'code', None)
+
+
+def _build_attachment_part(file_name: str, file_content: bytes) -> MIMEPart:
+    """Encode an attachment once into a ready-to-attach MIME part."""
+    content_type, _ = mimetypes.guess_type(file_name)
+    maintype, subtype = (content_type or 'application/octet-stream').split('/', 1)
+    part = MIMEPart(policy=policy.SMTP)
+    part.set_content(file_content, maintype=maintype, subtype=subtype,
+                     disposition='attachment', filename=file_name)
+    return part
+
+
+def _noop(*args, **kwargs):
+    pass
+
 
 class DebugLogger:
     def __init__(self, debug_mode: bool = False):
-        self.debug_mode = debug_mode
+        # Bind debug once so call sites skip the debug_mode check when it is off
+        self.debug = self._print_debug if debug_mode else _noop
 
-    def debug(self, message: str):
-        if self.debug_mode:
-            print(f"[DEBUG] {message}")
+    def _print_debug(self, message: str, *args):
+        print(f"[DEBUG] {message % args if args else message}")
 
 
 class EmailValidator:
     @staticmethod
-    def is_valid_email(email: str) -> bool:
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email))
+    def valid_emails_in(emails: List[str]) -> set:
+        """Return the subset of emails that are valid, scanning the whole batch in one regex pass."""
+        return set(_EMAIL_RE_MULTILINE.findall("\n".join(emails)))
+
+
+class RateLimiter:
+    """Token bucket shared by all sending threads."""
+
+    def __init__(self, target_rate: float):
+        self.min_interval = 1.0 / target_rate
+        self.next_allowed = monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Reserve the next send slot and return how long to wait for it."""
+        with self._lock:
+            now = monotonic()
+            delay = self.next_allowed - now
+            self.next_allowed = max(now, self.next_allowed) + self.min_interval
+        return max(delay, 0.0)
+
+    def wait(self):
+        # Sleep outside the lock so other threads can reserve their slots
+        delay = self.reserve()
+        if delay > 0:
+            sleep(delay)
+
+
+class BatchAbort(Exception):
+    """Raised when so many sends in a batch fail that the campaign should stop."""
+
+
+class FailureTracker:
+    """Counts send results per batch and aborts once a third of a batch has failed."""
+
+    def __init__(self, batch_size: int = ABORT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.attempts = 0
+        self.failures = 0
+
+    def record(self, success: bool):
+        self.attempts += 1
+        if not success:
+            self.failures += 1
+        if self.attempts >= self.batch_size:
+            if self.failures >= self.attempts / 3:
+                raise BatchAbort(f"{self.failures} of the last {self.attempts} emails failed")
+            self.attempts = 0
+            self.failures = 0
+
+
+class ProgressReporter:
+    """Streamlit progress bar and status line, updated in strides rather than per email."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.stride = max(1, total // 100)
+        self.progress_bar = st.progress(0)
+        self.status_text = st.empty()
+        self._last_update = monotonic()
+
+    def update(self, done: int, email: str, success: bool):
+        now = monotonic()
+        # The final update always goes through so the bar ends at 100%
+        if done != self.total and (done % self.stride or now - self._last_update < PROGRESS_UPDATE_INTERVAL):
+            return
+        self._last_update = now
+        if success:
+            self.status_text.text(f"Sent email to: {email}")
+        else:
+            self.status_text.text(f"Failed to send email to {email} after maximum retries")
+        self.progress_bar.progress(done / self.total)
+
+    def finish(self):
+        self.status_text.text("Email campaign completed!")
 
 
 class EmailAutomation:
     def __init__(self, debug_mode: bool = False):
         self.debug_logger = DebugLogger(debug_mode)
         self.logger = self._setup_logging()
-        self.smtp_server = None
+        self.smtp_pool = None
+        self.pool_size = 0
+        self.use_async = False
+        self._credentials = None
 
     def _setup_logging(self) -> logging.Logger:
         logger = logging.getLogger('ColdEmailAutomation')
@@ -48,117 +183,384 @@ class EmailAutomation:
         file_handler = logging.FileHandler(f'logs/email_log_{timestamp}.txt')
         formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+
+        # Buffer records in memory; written out every 1024 records, on errors, and in close()
+        self._log_buffer = logging.handlers.MemoryHandler(capacity=1024, flushLevel=logging.ERROR,
+                                                          target=file_handler)
+        logger.addHandler(self._log_buffer)
 
         return logger
 
-    def read_csv_content(self, csv_content) -> List[str]:
-        """Read and validate email addresses from CSV content."""
+    def read_csv_content(self, csv_file: BinaryIO) -> Iterator[str]:
+        """Stream valid email addresses from a binary CSV file object."""
         self.debug_logger.debug("Reading CSV content")
-        valid_emails = []
+        valid_count = 0
+        # Lowercased addresses already yielded, so duplicates are only sent once
+        seen = set()
 
+        # Decode incrementally instead of materializing the whole file as a str
+        text_file = io.TextIOWrapper(csv_file, encoding='utf-8-sig', newline='')
         try:
-            # Convert bytes to string if necessary
-            if isinstance(csv_content, bytes):
-                csv_content = csv_content.decode('utf-8')
-
-            # Create a CSV reader from the string content
-            csv_file = io.StringIO(csv_content)
-            reader = csv.DictReader(csv_file)
-
-            # Find email column
-            email_column = None
-            for column in reader.fieldnames:
-                if 'email' in column.lower():
-                    email_column = column
-                    break
-
-            if not email_column:
+            reader = csv.reader(text_file)
+            header = next(reader, [])
+
+            # Find email column: exact names first, so e.g. 'emailed_at' cannot shadow 'email_address'
+            columns = {}
+            for i, column in enumerate(header):
+                columns.setdefault(column.strip().lower(), i)
+            email_index = next((columns[name] for name in EMAIL_COLUMN_NAMES if name in columns), None)
+            if email_index is None:
+                email_index = next((i for name, i in columns.items() if 'email' in name), None)
+
+            if email_index is None:
                 raise ValueError("No email column found in CSV")
 
-            # Validate emails
+            # Validate emails in batches
+            batch = []
             for row in reader:
-                email = row[email_column].strip()
-                if EmailValidator.is_valid_email(email):
-                    valid_emails.append(email)
-                else:
-                    self.logger.warning(f"Invalid email found: {email}")
+                # Skip blank lines and rows too short to reach the email column
+                if len(row) <= email_index:
+                    continue
+                batch.append(row[email_index].strip())
+                if len(batch) >= CSV_BATCH_SIZE:
+                    valid = self._filter_valid(batch, seen)
+                    valid_count += len(valid)
+                    yield from valid
+                    batch = []
+
+            if batch:
+                valid = self._filter_valid(batch, seen)
+                valid_count += len(valid)
+                yield from valid
 
         except Exception as e:
-            self.logger.error(f"Error reading CSV: {str(e)}")
+            self.logger.error("Error reading CSV: %s", e)
             raise
-
-        self.debug_logger.debug(f"Found {len(valid_emails)} valid emails")
-        return valid_emails
-
-    def setup_smtp(self, email: str, password: str):
-        """Setup SMTP connection with Gmail."""
-        self.debug_logger.debug("Setting up SMTP connection")
+        finally:
+            # Detach so closing the wrapper does not close the caller's file
+            text_file.detach()
+
+        self.debug_logger.debug("Found %s valid emails", valid_count)
+
+    def _filter_valid(self, batch: List[str], seen: set) -> List[str]:
+        """Keep the valid, not yet seen emails of a batch in order, logging the invalid ones."""
+        valid = EmailValidator.valid_emails_in(batch)
+        result = []
+        for email in batch:
+            if email in valid:
+                lowered = email.lower()
+                if lowered in seen:
+                    self.debug_logger.debug("Skipping duplicate email: %s", email)
+                    continue
+                seen.add(lowered)
+                result.append(email)
+            else:
+                self.logger.warning("Invalid email found: %s", email)
+        return result
+
+    def setup_smtp(self, email: str, password: str, pool_size: int = DEFAULT_POOL_SIZE,
+                   use_async: bool = False):
+        """Setup a pool of SMTP connections with Gmail."""
+        self.debug_logger.debug("Setting up %s SMTP connections", pool_size)
+        self._credentials = (email, password)
+        self.use_async = use_async
+        if use_async:
+            # asyncio connections must be opened inside the event loop, see _send_all
+            self.pool_size = pool_size
+            return
+
+        self.smtp_pool = queue.Queue()
+        self.pool_size = 0
         try:
-            self.smtp_server = smtplib.SMTP('smtp.gmail.com', 587)
-            self.smtp_server.starttls()
-            self.smtp_server.login(email, password)
+            for _ in range(pool_size):
+                # Each pool entry is (connection, messages sent on it)
+                self.smtp_pool.put((self._connect(), 0))
+                self.pool_size += 1
             self.logger.info("SMTP connection established successfully")
         except Exception as e:
-            self.logger.error(f"SMTP setup failed: {str(e)}")
+            self.logger.error("SMTP setup failed: %s", e)
+            raise
+
+    def _connect(self) -> smtplib.SMTP:
+        """Open and authenticate a single SMTP connection."""
+        server = smtplib.SMTP('smtp.gmail.com', 587)
+        server.starttls()
+        server.login(*self._credentials)
+        return server
+
+    def _ensure_connection(self, server: smtplib.SMTP, messages_sent: int) -> tuple:
+        """Probe an SMTP session with NOOP and reconnect if it has dropped or is due for rotation."""
+        if messages_sent >= MAX_MESSAGES_PER_CONNECTION:
+            self.debug_logger.debug("Rotating SMTP connection after %s messages", messages_sent)
+            # close() drops the socket without a QUIT round trip that could itself fail
+            server.close()
+            return self._connect(), 0
+
+        try:
+            code, _ = server.noop()
+        except (smtplib.SMTPServerDisconnected, OSError):
+            code = None
+
+        if code != 250:
+            self.logger.warning("SMTP connection lost, reconnecting")
+            server.close()
+            return self._connect(), 0
+
+        return server, messages_sent
+
+    def _send_message(self, message: EmailMessage, sender: str, recipient: str):
+        """Send a message over a connection borrowed from the pool."""
+        server, messages_sent = self.smtp_pool.get()
+        try:
+            # A dropped connection goes back into the pool as-is and is
+            # rebuilt by the NOOP probe the next time it is borrowed
+            server, messages_sent = self._ensure_connection(server, messages_sent)
+            server.send_message(message, from_addr=sender, to_addrs=[recipient])
+            messages_sent += 1
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            # The server replied, so the session itself is still usable
+            raise
+        except OSError:
+            # Connection state is unknown; drop it so the NOOP probe reconnects
+            server.close()
             raise
+        finally:
+            self.smtp_pool.put((server, messages_sent))
+
+    def close(self):
+        """Close every pooled SMTP connection and this campaign's log handlers."""
+        if self._log_buffer is not None:
+            # Detach so later campaigns do not also log into this run's file
+            self.logger.removeHandler(self._log_buffer)
+            file_handler = self._log_buffer.target
+            self._log_buffer.close()  # flushes buffered records first
+            file_handler.close()
+            self._log_buffer = None
+        if not self.smtp_pool:
+            return
+        # close() drops the socket without waiting on the server's QUIT round trip
+        while not self.smtp_pool.empty():
+            server, _ = self.smtp_pool.get_nowait()
+            server.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def create_message(self, sender: str, recipient: str, subject: str,
-                       content: str, attachments: Optional[List[tuple]] = None) -> MIMEMultipart:
-        """Create email message with optional attachments."""
-        self.debug_logger.debug(f"Creating email message for: {recipient}")
-        message = MIMEMultipart()
+                       content: str, attachments: Optional[List[MIMEPart]] = None) -> EmailMessage:
+        """Create email message with optional prebuilt attachment parts."""
+        self.debug_logger.debug("Creating email message for: %s", recipient)
+        # Modern policy: 8-bit body, CRLF line endings, no legacy compat32 refolding
+        message = EmailMessage(policy=policy.SMTP)
         message['From'] = sender
         message['To'] = recipient
         message['Subject'] = subject
 
         # Add HTML content
-        message.attach(MIMEText(content, 'html'))
+        message.set_content(content, subtype='html')
 
-        # Add attachments if provided
+        # Add attachments if provided; copies share the already-encoded payload
         if attachments:
-            for file_name, file_content in attachments:
-                try:
-                    img = MIMEImage(file_content)
-                    img.add_header('Content-Disposition', 'attachment', filename=file_name)
-                    message.attach(img)
-                except Exception as e:
-                    self.logger.error(f"Error attaching file {file_name}: {str(e)}")
-                    raise
+            message.make_mixed()
+            for part in attachments:
+                message.attach(copy.copy(part))
 
         return message
 
+    def build_attachments(self, attachments: List[tuple]) -> List[MIMEPart]:
+        """Encode (file name, content) pairs into MIME parts once per campaign."""
+        parts = []
+        for file_name, file_content in attachments:
+            try:
+                parts.append(_build_attachment_part(file_name, file_content))
+            except Exception as e:
+                self.logger.error("Error attaching file %s: %s", file_name, e)
+                raise
+        return parts
+
     def send_emails(self, sender: str, emails: List[str], subject: str,
-                    content: str, attachments: Optional[List[tuple]] = None):
-        """Send emails to all recipients with retry mechanism."""
+                    content: str, attachments: Optional[List[MIMEPart]] = None,
+                    target_rate: float = 1.0):
+        """Send emails to all recipients in parallel over the SMTP pool, throttled to target_rate emails per second."""
         self.debug_logger.debug("Starting email sending process")
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-
-        for idx, email in enumerate(emails):
-            retries = 3
-            while retries > 0:
-                try:
-                    message = self.create_message(sender, email, subject, content, attachments)
-                    self.smtp_server.send_message(message)
-                    self.logger.info(f"Email sent successfully to {email}")
-                    self.debug_logger.debug(f"Email sent to: {email}")
-                    status_text.text(f"Sent email to: {email}")
-                    progress_bar.progress((idx + 1) / len(emails))
-                    sleep(1)
-                    break
-                except Exception as e:
-                    retries -= 1
-                    self.logger.error(f"Failed to send email to {email}: {str(e)}")
-                    if retries > 0:
-                        self.debug_logger.debug(f"Retrying email to {email}. Attempts remaining: {retries}")
-                        status_text.text(f"Retrying email to {email}... ({retries} attempts remaining)")
-                        sleep(2)
-                    else:
-                        self.logger.error(f"Max retries reached for {email}")
-                        status_text.text(f"Failed to send email to {email} after maximum retries")
-
-        status_text.text("Email campaign completed!")
+        reporter = ProgressReporter(len(emails))
+        limiter = RateLimiter(target_rate)
+        tracker = FailureTracker()
+
+        if self.use_async:
+            asyncio.run(self._send_all(sender, emails, subject, content, attachments,
+                                       limiter, reporter, tracker))
+            reporter.finish()
+            return
+
+        # One message template per worker thread; only its To header changes per recipient
+        templates = threading.local()
+
+        with ThreadPoolExecutor(max_workers=self.pool_size) as executor:
+            futures = {
+                executor.submit(self._send_with_retries, sender, email, subject,
+                                content, attachments, limiter, templates): email
+                for email in emails
+            }
+
+            # Streamlit elements are only updated from this thread, so progress stays monotonic
+            try:
+                for done, future in enumerate(as_completed(futures), start=1):
+                    success = future.result()
+                    reporter.update(done, futures[future], success)
+                    tracker.record(success)
+            except BatchAbort:
+                # Drop queued sends so leaving the executor only waits for in-flight ones
+                for future in futures:
+                    future.cancel()
+                raise
+
+        reporter.finish()
+
+    def _retry_delay(self, email: str, error: Exception, attempt: int) -> Optional[float]:
+        """Decide how long to wait before retrying a failed send, or None to give up."""
+        code = _smtp_code(error)
+        if code is not None and code // 100 == 5:
+            # Permanent failure (e.g. unknown mailbox); retrying only risks rate-limit penalties
+            self.logger.error("Permanent failure for %s (%s), not retrying", email, code)
+            return None
+        if code is None and isinstance(error, OSError):
+            # Dropped connection; it is rebuilt on next use, so retry straight away
+            return 0.0
+        # Transient 4xx reply or unexpected error: exponential backoff with jitter
+        return 2 ** attempt + random.random()
+
+    def _send_with_retries(self, sender: str, email: str, subject: str, content: str,
+                           attachments: Optional[List[MIMEPart]], limiter: RateLimiter,
+                           templates: threading.local) -> bool:
+        """Send a single email, retrying with exponential backoff. Runs on a worker thread."""
+        retries = 3
+        while retries > 0:
+            limiter.wait()
+            try:
+                message = getattr(templates, 'message', None)
+                if message is None:
+                    message = templates.message = self.create_message(sender, "", subject, content, attachments)
+                del message['To']
+                message['To'] = email
+                self._send_message(message, sender, email)
+                self.logger.info("Email sent successfully to %s", email)
+                self.debug_logger.debug("Email sent to: %s", email)
+                return True
+            except Exception as e:
+                retries -= 1
+                self.logger.error("Failed to send email to %s: %s", email, e)
+                delay = self._retry_delay(email, e, 3 - retries)
+                if delay is None:
+                    return False
+                if retries > 0:
+                    self.debug_logger.debug("Retrying email to %s. Attempts remaining: %s", email, retries)
+                    sleep(delay)
+                else:
+                    self.logger.error("Max retries reached for %s", email)
+        return False
+
+    async def _connect_async(self):
+        """Open and authenticate a single aiosmtplib connection."""
+        server = aiosmtplib.SMTP(hostname='smtp.gmail.com', port=587, start_tls=True)
+        await server.connect()
+        await server.login(*self._credentials)
+        return server
+
+    async def _ensure_connection_async(self, server, messages_sent: int) -> tuple:
+        """asyncio counterpart of _ensure_connection."""
+        if messages_sent >= MAX_MESSAGES_PER_CONNECTION:
+            self.debug_logger.debug("Rotating SMTP connection after %s messages", messages_sent)
+            # close() drops the socket without a QUIT round trip that could itself fail
+            server.close()
+            return await self._connect_async(), 0
+
+        try:
+            code = (await server.noop()).code
+        except (aiosmtplib.SMTPException, OSError):
+            code = None
+
+        if code != 250:
+            self.logger.warning("SMTP connection lost, reconnecting")
+            server.close()
+            return await self._connect_async(), 0
+
+        return server, messages_sent
+
+    async def _send_all(self, sender: str, emails: List[str], subject: str, content: str,
+                        attachments: Optional[List[MIMEPart]], limiter: RateLimiter,
+                        reporter: ProgressReporter, tracker: FailureTracker):
+        """Send all emails concurrently over a pool of aiosmtplib connections."""
+        # One [connection, messages sent on it, message template] slot per worker coroutine,
+        # so only that worker touches the template's To header
+        pool = []
+        workers = []
+        try:
+            # Filled inside the try so a failed connect still closes the ones already opened
+            for _ in range(self.pool_size):
+                template = self.create_message(sender, "", subject, content, attachments)
+                pool.append([await self._connect_async(), 0, template])
+            self.logger.info("SMTP connection established successfully")
+
+            # Like the threaded path, only pool_size sends wait on the rate limiter at a time,
+            # so a retry's backoff is not queued behind every remaining recipient
+            recipients = iter(emails)
+            results = asyncio.Queue()
+            workers = [asyncio.ensure_future(self._send_worker(slot, sender, recipients, results, limiter))
+                       for slot in pool]
+            for done in range(1, len(emails) + 1):
+                email, success = await results.get()
+                reporter.update(done, email, success)
+                tracker.record(success)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            for server, _, _ in pool:
+                server.close()
+
+    async def _send_worker(self, slot: list, sender: str, recipients: Iterator[str],
+                           results: asyncio.Queue, limiter: RateLimiter):
+        """Send to recipients from the shared iterator over this worker's connection slot."""
+        for email in recipients:
+            success = await self._send_with_retries_async(slot, sender, email, limiter)
+            results.put_nowait((email, success))
+
+    async def _send_with_retries_async(self, slot: list, sender: str, email: str,
+                                       limiter: RateLimiter) -> bool:
+        """asyncio counterpart of _send_with_retries."""
+        retries = 3
+        while retries > 0:
+            await asyncio.sleep(limiter.reserve())
+            try:
+                slot[0], slot[1] = await self._ensure_connection_async(slot[0], slot[1])
+                message = slot[2]
+                del message['To']
+                message['To'] = email
+                await slot[0].send_message(message, sender=sender, recipients=[email])
+                slot[1] += 1
+                self.logger.info("Email sent successfully to %s", email)
+                self.debug_logger.debug("Email sent to: %s", email)
+                return True
+            except Exception as e:
+                retries -= 1
+                self.logger.error("Failed to send email to %s: %s", email, e)
+                if isinstance(e, OSError):
+                    # Connection state is unknown; drop it so the NOOP probe reconnects
+                    slot[0].close()
+                delay = self._retry_delay(email, e, 3 - retries)
+
+            if delay is None:
+                return False
+            if retries > 0:
+                self.debug_logger.debug("Retrying email to %s. Attempts remaining: %s", email, retries)
+                await asyncio.sleep(delay)
+            else:
+                self.logger.error("Max retries reached for %s", email)
+        return False
 
 
 def main():
@@ -186,6 +588,11 @@ def main():
     subject = st.text_input("Email Subject")
     content = st.text_area("Email Content (HTML supported)")
 
+    # Sending rate
+    target_rate = st.slider("Sending rate (emails per second)", min_value=0.5, max_value=10.0, value=1.0, step=0.5)
+    pool_size = st.number_input("Parallel SMTP connections", min_value=1, max_value=10, value=DEFAULT_POOL_SIZE)
+    use_async = aiosmtplib is not None and st.checkbox("Send with asyncio (aiosmtplib)")
+
     if st.button("Send Emails"):
         try:
             if not csv_file:
@@ -196,38 +603,37 @@ def main():
                 st.error("Please fill in both subject and content")
                 return
 
-            automation = EmailAutomation(debug_mode)
+            with EmailAutomation(debug_mode) as automation:
+                # Read CSV; only the valid addresses are kept in memory
+                emails = list(automation.read_csv_content(csv_file))
 
-            # Read CSV
-            csv_content = csv_file.read()
-            emails = automation.read_csv_content(csv_content)
+                if not emails:
+                    st.error("No valid email addresses found in CSV")
+                    return
 
-            if not emails:
-                st.error("No valid email addresses found in CSV")
-                return
+                st.info(f"Found {len(emails)} valid email addresses")
 
-            st.info(f"Found {len(emails)} valid email addresses")
+                # Process attachments
+                attachments = []
+                if attachment_files:
+                    for file in attachment_files:
+                        attachments.append((file.name, file.read()))
+                attachments = automation.build_attachments(attachments)
 
-            # Process attachments
-            attachments = []
-            if attachment_files:
-                for file in attachment_files:
-                    attachments.append((file.name, file.read()))
+                # Setup SMTP
+                automation.setup_smtp(sender_email, sender_password, int(pool_size), use_async)
 
-            # Setup SMTP
-            automation.setup_smtp(sender_email, sender_password)
+                # Send emails
+                automation.send_emails(sender_email, emails, subject, content, attachments, target_rate)
 
-            # Send emails
-            automation.send_emails(sender_email, emails, subject, content, attachments)
-
-            st.success("Email campaign completed successfully!")
+                st.success("Email campaign completed successfully!")
 
+        except BatchAbort as e:
+            st.error(f"Campaign aborted: {str(e)}")
+            logging.error("Campaign aborted: %s", e)
         except Exception as e:
             st.error(f"An error occurred: {str(e)}")
-            logging.error(f"Critical error: {str(e)}")
-        finally:
-            if automation.smtp_server:
-                automation.smtp_server.quit()
+            logging.error("Critical error: %s", e)
 
 
 if __name__ == "__main__":